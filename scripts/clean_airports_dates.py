@@ -1,15 +1,78 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import sys
 from datetime import datetime
+from pathlib import Path
 
-def clean_airports_and_dates(input_file, output_file):
+# Define project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_RAW = PROJECT_ROOT / 'data' / 'raw'
+DATA_PROCESSED = PROJECT_ROOT / 'data' / 'processed'
+REPORTS = PROJECT_ROOT / 'reports'
+
+def clean_code_column(s):
+    """
+    Strip whitespace and uppercase a categorical code column at the
+    category level, reusing the stripped categories to count issues.
+    Returns (cleaned series, rows with whitespace, rows not uppercase).
+    """
+    cats = s.cat.categories
+    stripped = cats.str.strip()
+    cleaned = stripped.str.upper()
+    counts = s.value_counts()
+    has_whitespace = int(counts.reindex(cats[stripped != cats]).sum())
+    has_lowercase = int(counts.reindex(cats[cleaned != stripped]).sum())
+    if cleaned.is_unique:
+        cleaned_series = s.cat.rename_categories(cleaned)
+    else:
+        # Cleaning merged categories (e.g. ' alg' and 'ALG'): remap values
+        cleaned_series = s.map(dict(zip(cats, cleaned))).astype('category')
+    return cleaned_series, has_whitespace, has_lowercase
+
+def valid_iata_mask(s):
+    """
+    Row-level mask of valid 3-letter IATA codes for a categorical column.
+    The ^[A-Z]{3}$ pattern runs through Arrow's C++ regex kernel over the
+    few dozen categories only and is broadcast back through the codes.
+    """
+    cat_valid = pc.match_substring_regex(
+        pa.array(s.cat.categories), r'^[A-Z]{3}$'
+    ).to_numpy(zero_copy_only=False)
+    codes = np.asarray(s.cat.codes)
+    return pd.Series(np.where(codes >= 0, cat_valid[codes], False), index=s.index)
+
+def clean_airports_and_dates(df_or_path, output_file):
     """
     Clean departureairport, arrivalairport, and origindate columns
-    AND remove exact duplicate rows
+    AND remove exact duplicate rows.
+    Accepts either a path to a CSV file or a DataFrame handed over
+    in memory by the previous pipeline stage (no CSV round-trip).
     """
-    print(f"Reading data from {input_file}...")
-    df = pd.read_csv(input_file)
-    
+    if isinstance(df_or_path, pd.DataFrame):
+        print("Using in-memory DataFrame from previous pipeline stage...")
+        input_file = '<in-memory DataFrame>'
+        df = df_or_path.copy()
+        for col in ('departureairport', 'arrivalairport', 'departureorarrival'):
+            df[col] = df[col].astype('category')
+    else:
+        input_file = df_or_path
+        print(f"Reading data from {input_file}...")
+        # Categorical dtype stores each airport code once (dictionary
+        # encoding), so string cleaning/validation touches ~70 categories
+        # instead of every row; parse_dates skips the separate origindate
+        # inference pass
+        df = pd.read_csv(
+            input_file,
+            dtype={
+                'departureairport': 'category',
+                'arrivalairport': 'category',
+                'departureorarrival': 'category',
+            },
+            parse_dates=['origindate'],
+        )
+
     print(f"Initial shape: {df.shape}")
     print(f"\n{'='*70}")
     print(f"BEFORE CLEANING:")
@@ -27,29 +90,31 @@ def clean_airports_and_dates(input_file, output_file):
     print(f"STEP 1: CLEANING DEPARTUREAIRPORT")
     print(f"{'='*70}")
     
-    # Check for issues before cleaning
-    has_whitespace = df['departureairport'].str.contains(r'^\s|\s$', regex=True, na=False).sum()
-    has_lowercase = (~df['departureairport'].str.isupper()).sum()
-    non_standard = df[~df['departureairport'].str.match(r'^[A-Z]{3}$|^[A-Za-z]{7}$', na=False)]
-    
+    # Strip whitespace and convert to uppercase on the categories only;
+    # issue counts fall out of the same pass (no regex scans)
+    df['departureairport'], has_whitespace, has_lowercase = clean_code_column(df['departureairport'])
+
     print(f"  Issues found:")
     print(f"  - Records with whitespace: {has_whitespace}")
     print(f"  - Records not all uppercase: {has_lowercase}")
-    print(f"  - Non-standard length codes: {len(non_standard)}")
-    
-    # Strip whitespace and convert to uppercase
-    df['departureairport'] = df['departureairport'].str.strip().str.upper()
     
-    # Check for KRECHBA
-    krechba_count = (df['departureairport'] == 'KRECHBA').sum()
+    # Check for KRECHBA (mask computed once, reused for count and display)
+    krechba_mask = df['departureairport'] == 'KRECHBA'
+    krechba_count = int(krechba_mask.sum())
     if krechba_count > 0:
         print(f"\n  WARNING: Found {krechba_count} record(s) with 'KRECHBA' (non-standard IATA code)")
-        krechba_records = df[df['departureairport'] == 'KRECHBA'][['airline', 'flightnumber', 'departureairport', 'arrivalairport', 'origindate']]
-        print(f"  Details:\n{krechba_records.to_string(index=False)}")
+        krechba_records = df[krechba_mask][['airline', 'flightnumber', 'departureairport', 'arrivalairport', 'origindate']]
+        # Cap the rendered slice so the display stays constant-time even if
+        # future data contains thousands of such records
+        print(f"  Details:\n{krechba_records.head(20).to_string(index=False)}")
+        if krechba_count > 20:
+            print(f"  ... ({krechba_count - 20} more record(s) not shown)")
         print(f"  ACTION: Keeping KRECHBA for manual review (charter/industrial flight)")
-    
-    # Validate all airport codes
-    valid_codes = df['departureairport'].str.match(r'^[A-Z]{3}$|^KRECHBA$', na=False).sum()
+
+    # Validate all airport codes against the full IATA pattern via Arrow's
+    # regex over the categories (KRECHBA is the known non-standard outlier)
+    mask_valid_dep = valid_iata_mask(df['departureairport']) | krechba_mask
+    valid_codes = int(mask_valid_dep.sum())
     print(f"\n  SUCCESS: Cleaned: {valid_codes}/{len(df)} codes are valid")
     print(f"  SUCCESS: All values now uppercase and trimmed")
     
@@ -57,20 +122,19 @@ def clean_airports_and_dates(input_file, output_file):
     print(f"STEP 2: CLEANING ARRIVALAIRPORT")
     print(f"{'='*70}")
     
-    # Check for issues before cleaning
-    has_whitespace = df['arrivalairport'].str.contains(r'^\s|\s$', regex=True, na=False).sum()
-    has_lowercase = (~df['arrivalairport'].str.isupper()).sum()
-    
+    # Strip whitespace and convert to uppercase on the categories only;
+    # issue counts fall out of the same pass (no regex scans)
+    df['arrivalairport'], has_whitespace, has_lowercase = clean_code_column(df['arrivalairport'])
+
     print(f"  Issues found:")
     print(f"  - Records with whitespace: {has_whitespace}")
     print(f"  - Records not all uppercase: {has_lowercase}")
-    
-    # Strip whitespace and convert to uppercase
-    df['arrivalairport'] = df['arrivalairport'].str.strip().str.upper()
-    
-    # Validate all airport codes are 3 characters (standard IATA)
-    valid_codes = df['arrivalairport'].str.match(r'^[A-Z]{3}$', na=False).sum()
-    invalid_arr = df[~df['arrivalairport'].str.match(r'^[A-Z]{3}$', na=False)]
+
+    # Validate all airport codes against the full IATA pattern; the mask
+    # is reused for the count, the invalid display and the final report
+    mask_valid_arr = valid_iata_mask(df['arrivalairport'])
+    valid_codes = int(mask_valid_arr.sum())
+    invalid_arr = df[~mask_valid_arr]
     
     if len(invalid_arr) > 0:
         print(f"  WARNING: {len(invalid_arr)} invalid arrival airport codes found")
@@ -98,10 +162,10 @@ def clean_airports_and_dates(input_file, output_file):
         if len(future_dates) > 0:
             print(f"  NOTE: {len(future_dates)} dates are in the past (data from Dec 2024)")
         
-        # Convert back to string format YYYY-MM-DD for consistency
-        df['origindate'] = df['origindate'].dt.strftime('%Y-%m-%d')
-        print(f"  SUCCESS: Dates standardized to YYYY-MM-DD format")
-        
+        # Keep native datetime64 — to_csv's date_format writes YYYY-MM-DD
+        # without an O(n) per-element strftime round-trip through Python strings
+        print(f"  SUCCESS: Dates kept as datetime64 (formatted YYYY-MM-DD on save)")
+
     except Exception as e:
         print(f"  ERROR: cleaning dates: {e}")
         return
@@ -110,32 +174,40 @@ def clean_airports_and_dates(input_file, output_file):
     print(f"STEP 4: REMOVING EXACT DUPLICATES")
     print(f"{'='*70}")
     
-    # Check duplicates after cleaning
+    # Hash all columns once: the same boolean mask gives the count, the
+    # percentage and the deduplicated frame (no second pass in drop_duplicates)
     initial_rows = len(df)
-    duplicates_found = df.duplicated().sum()
-    
+    dup_mask = df.duplicated(keep='first')
+    duplicates_found = int(dup_mask.sum())
+
     print(f"  Duplicate analysis:")
     print(f"  - Total rows: {initial_rows}")
     print(f"  - Duplicate rows: {duplicates_found} ({duplicates_found/initial_rows*100:.1f}%)")
     print(f"  - Unique rows: {initial_rows - duplicates_found}")
     
-    # Show duplication statistics
-    dup_counts = df.groupby(df.columns.tolist()).size().reset_index(name='count')
-    dup_stats = dup_counts['count'].describe()
+    # Show duplication statistics on the flight identity key only —
+    # hashing all 10 columns just for these stats costs more than the
+    # drop_duplicates call itself
+    dup_key = ['airline', 'flightnumber', 'departureairport', 'arrivalairport', 'origindate']
+    # observed=True: on pandas 2.x the default (observed=False) would
+    # enumerate the cartesian product of the categorical airport columns,
+    # flooding the stats with empty groups
+    dup_counts = df.groupby(dup_key, sort=False, observed=True).size()
+    dup_stats = dup_counts.describe()
     print(f"\n  Duplication frequency:")
     print(f"  - Average duplicates per unique flight: {dup_stats['mean']:.1f}")
     print(f"  - Maximum duplicates for one flight: {int(dup_stats['max'])}")
     print(f"  - Median duplicates: {dup_stats['50%']:.0f}")
-    
+
     # Show examples of most duplicated flights
-    top_dups = dup_counts.nlargest(5, 'count')
+    top_dups = dup_counts.nlargest(5)
     print(f"\n  Top 5 most duplicated flights:")
-    for idx, row in top_dups.iterrows():
-        print(f"    - {row['airline']} {row['flightnumber']} ({row['departureairport']}->{row['arrivalairport']}) on {row['origindate']}: {row['count']} times")
+    for (airline, flightnumber, dep, arr, origindate), count in top_dups.items():
+        print(f"    - {airline} {flightnumber} ({dep}->{arr}) on {origindate:%Y-%m-%d}: {count} times")
     
-    # Remove duplicates keeping first occurrence
-    df = df.drop_duplicates(keep='first')
-    removed_duplicates = initial_rows - len(df)
+    # Remove duplicates keeping first occurrence (reuses the mask computed above)
+    df = df.loc[~dup_mask]
+    removed_duplicates = duplicates_found
     
     print(f"\n  SUCCESS: Removed {removed_duplicates} duplicate rows")
     print(f"  SUCCESS: Retained first occurrence of each unique record")
@@ -164,99 +236,124 @@ def clean_airports_and_dates(input_file, output_file):
     print(f"SAVING CLEANED DATA")
     print(f"{'='*70}")
     print(f"  Output file: {output_file}")
-    df.to_csv(output_file, index=False)
+    # pandas' writer is kept here because Arrow's CSV writer always quotes
+    # string fields (its quoting_style option only affects non-string
+    # types), which would churn the committed artifact's format.
+    # Day-format origindate only at write time: a frame-wide date_format
+    # would also truncate operationtime, which arrives as full datetime64
+    # in the fused-pipeline path
+    df.assign(origindate=df['origindate'].dt.date).to_csv(output_file, index=False)
     print(f"  SUCCESS: Saved {len(df)} rows")
     print(f"  SUCCESS: Data cleaning complete!")
     
     # Generate summary report
-    report_file = r"c:\Users\KOTEK INFORMATIQUE\Desktop\w9\Data_mining_project\reports\flights_cleaned_airports_dates_report.txt"
+    report_file = REPORTS / 'flights_cleaned_airports_dates_report.txt'
     print(f"\n  Generating report: {report_file}")
     
+    # Build the whole report as one string and write it in a single call
+    # (one syscall instead of ~40 f.write calls)
+    bar = "=" * 80
+    dash = "   " + "-" * 50
+    # Reuse the STEP 2 validity mask, restricted to the rows kept by dedup
+    n_arr_valid = int(mask_valid_arr[~dup_mask].sum())
+    krechba_line = (
+        f"   [WARNING] Found {krechba_count} non-standard code: KRECHBA (kept for review)\n"
+        if krechba_count > 0 else ""
+    )
+
+    report = f"""{bar}
+DATA CLEANING SUMMARY REPORT - AIRPORTS AND DATES
+{bar}
+
+Input file: {input_file}
+Output file: {output_file}
+Cleaning date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+{bar}
+WHAT WAS DONE
+{bar}
+
+1. DEPARTUREAIRPORT CLEANING
+{dash}
+   [DONE] Stripped leading and trailing whitespace
+   [DONE] Converted all values to uppercase
+   [DONE] Validated IATA airport codes (3 characters)
+{krechba_line}   [DONE] Result: {df['departureairport'].nunique()} unique airport codes
+
+2. ARRIVALAIRPORT CLEANING
+{dash}
+   [DONE] Stripped leading and trailing whitespace
+   [DONE] Converted all values to uppercase
+   [DONE] Validated IATA airport codes (3 characters)
+   [DONE] All codes conform to IATA standard
+   [DONE] Result: {df['arrivalairport'].nunique()} unique airport codes
+
+3. ORIGINDATE CLEANING
+{dash}
+   [DONE] Validated date format consistency
+   [DONE] Parsed dates using pandas.to_datetime()
+   [DONE] Standardized output format to YYYY-MM-DD
+   [DONE] Verified chronological validity
+   [DONE] Date range: {df['origindate'].min():%Y-%m-%d} to {df['origindate'].max():%Y-%m-%d}
+
+4. DUPLICATE REMOVAL
+{dash}
+   - Original rows: {initial_rows}
+   - Duplicate rows found: {removed_duplicates} ({removed_duplicates/initial_rows*100:.1f}%)
+   - Unique rows retained: {len(df)}
+   - Average duplicates per flight: {dup_stats['mean']:.1f}
+   - Maximum duplicates for one flight: {int(dup_stats['max'])}
+   [DONE] Method: Kept first occurrence of each duplicate
+   [DONE] Reason: Data likely contains multiple status updates/polling
+
+{bar}
+FINAL STATISTICS
+{bar}
+
+Dataset size:
+  Before: {initial_rows} rows × {df.shape[1]} columns
+  After:  {len(df)} rows × {df.shape[1]} columns
+  Reduction: {removed_duplicates} rows ({removed_duplicates/initial_rows*100:.1f}%)
+
+Data quality:
+  NULL values: 0 in all three columns
+  IATA compliance: {n_arr_valid}/{len(df)} (100%) for arrivals
+  Date validity: 100%
+  Format consistency: 100%
+
+Top airports:
+  Departure: {df['departureairport'].value_counts().head(5).to_dict()}
+  Arrival: {df['arrivalairport'].value_counts().head(5).to_dict()}
+
+{bar}
+WHY SO MANY DUPLICATES?
+{bar}
+
+The high duplicate rate (81.6%) is NORMAL for flight tracking data:
+
+1. Status Updates: Flights are tracked through multiple states
+   - Scheduled -> Boarding -> Departed -> En Route -> Landed
+   - Each state change creates a new record
+
+2. Polling/Refresh: Data collection systems poll at intervals
+   - System queries flight status every X minutes
+   - Creates snapshot records even if status unchanged
+
+3. System Synchronization: Multiple data sources
+   - Airport systems, airline systems, radar data
+   - Synchronization can create duplicate entries
+
+CONCLUSION: Removing these duplicates is CORRECT and necessary
+for accurate analysis. We keep the first occurrence which
+represents the initial detection of each unique flight.
+
+{bar}
+END OF REPORT
+{bar}
+"""
+
     with open(report_file, 'w', encoding='utf-8') as f:
-        f.write("="*80 + "\n")
-        f.write("DATA CLEANING SUMMARY REPORT - AIRPORTS AND DATES\n")
-        f.write("="*80 + "\n\n")
-        f.write(f"Input file: {input_file}\n")
-        f.write(f"Output file: {output_file}\n")
-        f.write(f"Cleaning date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        f.write("="*80 + "\n")
-        f.write("WHAT WAS DONE\n")
-        f.write("="*80 + "\n\n")
-        
-        f.write("1. DEPARTUREAIRPORT CLEANING\n")
-        f.write("   " + "-"*50 + "\n")
-        f.write("   [DONE] Stripped leading and trailing whitespace\n")
-        f.write("   [DONE] Converted all values to uppercase\n")
-        f.write("   [DONE] Validated IATA airport codes (3 characters)\n")
-        if krechba_count > 0:
-            f.write(f"   [WARNING] Found {krechba_count} non-standard code: KRECHBA (kept for review)\n")
-        f.write(f"   [DONE] Result: {df['departureairport'].nunique()} unique airport codes\n\n")
-        
-        f.write("2. ARRIVALAIRPORT CLEANING\n")
-        f.write("   " + "-"*50 + "\n")
-        f.write("   [DONE] Stripped leading and trailing whitespace\n")
-        f.write("   [DONE] Converted all values to uppercase\n")
-        f.write("   [DONE] Validated IATA airport codes (3 characters)\n")
-        f.write("   [DONE] All codes conform to IATA standard\n")
-        f.write(f"   [DONE] Result: {df['arrivalairport'].nunique()} unique airport codes\n\n")
-        
-        f.write("3. ORIGINDATE CLEANING\n")
-        f.write("   " + "-"*50 + "\n")
-        f.write("   [DONE] Validated date format consistency\n")
-        f.write("   [DONE] Parsed dates using pandas.to_datetime()\n")
-        f.write("   [DONE] Standardized output format to YYYY-MM-DD\n")
-        f.write("   [DONE] Verified chronological validity\n")
-        f.write(f"   [DONE] Date range: {df['origindate'].min()} to {df['origindate'].max()}\n\n")
-        
-        f.write("4. DUPLICATE REMOVAL\n")
-        f.write("   " + "-"*50 + "\n")
-        f.write(f"   - Original rows: {initial_rows}\n")
-        f.write(f"   - Duplicate rows found: {removed_duplicates} ({removed_duplicates/initial_rows*100:.1f}%)\n")
-        f.write(f"   - Unique rows retained: {len(df)}\n")
-        f.write(f"   - Average duplicates per flight: {dup_stats['mean']:.1f}\n")
-        f.write(f"   - Maximum duplicates for one flight: {int(dup_stats['max'])}\n")
-        f.write("   [DONE] Method: Kept first occurrence of each duplicate\n")
-        f.write("   [DONE] Reason: Data likely contains multiple status updates/polling\n\n")
-        
-        f.write("="*80 + "\n")
-        f.write("FINAL STATISTICS\n")
-        f.write("="*80 + "\n\n")
-        f.write(f"Dataset size:\n")
-        f.write(f"  Before: {initial_rows} rows × 10 columns\n")
-        f.write(f"  After:  {len(df)} rows × 10 columns\n")
-        f.write(f"  Reduction: {removed_duplicates} rows ({removed_duplicates/initial_rows*100:.1f}%)\n\n")
-        
-        f.write(f"Data quality:\n")
-        f.write(f"  NULL values: 0 in all three columns\n")
-        f.write(f"  IATA compliance: {(df['arrivalairport'].str.len() == 3).sum()}/{len(df)} (100%) for arrivals\n")
-        f.write(f"  Date validity: 100%\n")
-        f.write(f"  Format consistency: 100%\n\n")
-        
-        f.write(f"Top airports:\n")
-        f.write(f"  Departure: {df['departureairport'].value_counts().head(5).to_dict()}\n")
-        f.write(f"  Arrival: {df['arrivalairport'].value_counts().head(5).to_dict()}\n\n")
-        
-        f.write("="*80 + "\n")
-        f.write("WHY SO MANY DUPLICATES?\n")
-        f.write("="*80 + "\n\n")
-        f.write("The high duplicate rate (81.6%) is NORMAL for flight tracking data:\n\n")
-        f.write("1. Status Updates: Flights are tracked through multiple states\n")
-        f.write("   - Scheduled -> Boarding -> Departed -> En Route -> Landed\n")
-        f.write("   - Each state change creates a new record\n\n")
-        f.write("2. Polling/Refresh: Data collection systems poll at intervals\n")
-        f.write("   - System queries flight status every X minutes\n")
-        f.write("   - Creates snapshot records even if status unchanged\n\n")
-        f.write("3. System Synchronization: Multiple data sources\n")
-        f.write("   - Airport systems, airline systems, radar data\n")
-        f.write("   - Synchronization can create duplicate entries\n\n")
-        f.write("CONCLUSION: Removing these duplicates is CORRECT and necessary\n")
-        f.write("for accurate analysis. We keep the first occurrence which\n")
-        f.write("represents the initial detection of each unique flight.\n\n")
-        
-        f.write("="*80 + "\n")
-        f.write("END OF REPORT\n")
-        f.write("="*80 + "\n")
+        f.write(report)
     
     print(f"  SUCCESS: Report generated successfully")
     print(f"\n{'='*70}")
@@ -264,7 +361,7 @@ def clean_airports_and_dates(input_file, output_file):
     print(f"{'='*70}\n")
 
 if __name__ == "__main__":
-    input_file = r"c:\Users\KOTEK INFORMATIQUE\Desktop\w9\Data_mining_project\data\raw\flights_clean.csv"
-    output_file = r"c:\Users\KOTEK INFORMATIQUE\Desktop\w9\Data_mining_project\data\processed\flights_cleaned_airports_dates.csv"
-    
+    input_file = DATA_RAW / 'flights_clean.csv'
+    output_file = DATA_PROCESSED / 'flights_cleaned_airports_dates.csv'
+
     clean_airports_and_dates(input_file, output_file)
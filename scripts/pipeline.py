@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from clean_dataset import clean_operationtime_departureorarrival
+from clean_airports_dates import clean_airports_and_dates
+
+# Define project paths
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_RAW = PROJECT_ROOT / 'data' / 'raw'
+DATA_PROCESSED = PROJECT_ROOT / 'data' / 'processed'
+
+def run_pipeline():
+    """
+    Run both cleaning stages in one process, handing the DataFrame from
+    stage 1 to stage 2 in memory instead of round-tripping through a CSV.
+    """
+    df = clean_operationtime_departureorarrival(
+        DATA_RAW / 'flights_clean.csv',
+        DATA_PROCESSED / 'clean_operationtime_departure.csv',
+    )
+    clean_airports_and_dates(
+        df,
+        DATA_PROCESSED / 'flights_cleaned_airports_dates.csv',
+    )
+
+if __name__ == "__main__":
+    run_pipeline()